@@ -10,9 +10,15 @@ from contextlib import suppress
 from pathlib import Path
 from typing import Dict, Iterable, List, Optional, Tuple
 
+import orjson
 import pyarrow.flight as flight
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 # Allow running from repository root without installation
 REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
@@ -23,14 +29,22 @@ from shared.network import apply_tcp_settings  # noqa: E402  pylint: disable=wro
 
 LOGGER = logging.getLogger("flight_client")
 
+ECHO_ACTION = "echo"
+
 
 class ClientConfigurationError(Exception):
     """Raised when the client configuration is invalid."""
 
 
-def _load_config(path: Path) -> Dict:
-    with path.open("r", encoding="utf8") as f:
-        data = yaml.safe_load(f)
+def _load_config(path: Path, inline_json: Optional[str] = None) -> Dict:
+    if inline_json is not None:
+        try:
+            data = json.loads(inline_json)
+        except ValueError as exc:
+            raise ClientConfigurationError(f"Invalid inline JSON configuration: {exc}") from exc
+    else:
+        with path.open("r", encoding="utf8") as f:
+            data = yaml.load(f, Loader=_YamlLoader)
     if not isinstance(data, dict) or "client" not in data:
         raise ClientConfigurationError("Configuration must contain a 'client' key")
     return data
@@ -59,36 +73,26 @@ def _build_generic_options(options: List[Dict[str, str]]) -> List[Tuple[str, str
     return generic_options
 
 
-def _build_delay_strategy(config: Dict) -> DelayStrategy:
-    delay_cfg = config.get("delay", {})
-    return DelayStrategy(
-        strategy=delay_cfg.get("strategy", "fixed"),
-        initial_ms=float(delay_cfg.get("initial_ms", 0.0)),
-        linear_increment_ms=float(delay_cfg.get("linear_increment_ms", 0.0)),
-        multiplier=float(delay_cfg.get("multiplier", 1.0)),
-        exponential_base=float(delay_cfg.get("exponential_base", 2.0)),
-        max_ms=float(delay_cfg["max_ms"]) if delay_cfg.get("max_ms") is not None else None,
-    )
+_STRATEGY_FLOAT_FIELDS = (
+    ("initial_ms", 0.0),
+    ("linear_increment_ms", 0.0),
+    ("multiplier", 1.0),
+    ("exponential_base", 2.0),
+)
 
 
-def _build_interval_strategy(config: Dict) -> DelayStrategy:
-    interval_cfg = config.get("interval", {})
+def _build_strategy(config: Dict, section: str) -> DelayStrategy:
+    section_cfg = config.get(section) or {}
+    max_ms = section_cfg.get("max_ms")
     return DelayStrategy(
-        strategy=interval_cfg.get("strategy", "fixed"),
-        initial_ms=float(interval_cfg.get("initial_ms", 0.0)),
-        linear_increment_ms=float(interval_cfg.get("linear_increment_ms", 0.0)),
-        multiplier=float(interval_cfg.get("multiplier", 1.0)),
-        exponential_base=float(interval_cfg.get("exponential_base", 2.0)),
-        max_ms=float(interval_cfg["max_ms"]) if interval_cfg.get("max_ms") is not None else None,
+        strategy=section_cfg.get("strategy", "fixed"),
+        max_ms=None if max_ms is None else float(max_ms),
+        **{name: float(section_cfg.get(name, default)) for name, default in _STRATEGY_FLOAT_FIELDS},
     )
 
 
-def _build_headers(strategy: DelayStrategy, current_delay_s: float) -> List[Tuple[bytes, bytes]]:
-    delay_ms = max(current_delay_s * 1000.0, 0.0)
-    headers = [
-        (b"x-delay-strategy", strategy.strategy.encode("utf8")),
-        (b"x-delay-initial-ms", f"{delay_ms:.3f}".encode("utf8")),
-    ]
+def _build_static_headers(strategy: DelayStrategy) -> List[Tuple[bytes, bytes]]:
+    headers = [(b"x-delay-strategy", strategy.strategy.encode("utf8"))]
     if strategy.strategy == "linear":
         headers.append((b"x-delay-linear-increment-ms", f"{strategy.linear_increment_ms:.3f}".encode("utf8")))
     if strategy.strategy == "multiplier":
@@ -100,8 +104,13 @@ def _build_headers(strategy: DelayStrategy, current_delay_s: float) -> List[Tupl
     return headers
 
 
-def run_client(config_path: Path) -> None:
-    config = _load_config(config_path)
+def _build_headers(static_headers: List[Tuple[bytes, bytes]], current_delay_s: float) -> List[Tuple[bytes, bytes]]:
+    delay_ms = max(current_delay_s * 1000.0, 0.0)
+    return [(b"x-delay-initial-ms", f"{delay_ms:.3f}".encode("utf8")), *static_headers]
+
+
+def run_client(config_path: Path, config_json: Optional[str] = None) -> None:
+    config = _load_config(config_path, config_json)
     client_cfg = config["client"]
 
     log_file = Path(client_cfg.get("log_file", "client.log"))
@@ -117,17 +126,25 @@ def run_client(config_path: Path) -> None:
 
     client = build_client()
 
-    delay_strategy = _build_delay_strategy(client_cfg)
-    interval_strategy = _build_interval_strategy(client_cfg)
+    delay_strategy = _build_strategy(client_cfg, "delay")
+    interval_strategy = _build_strategy(client_cfg, "interval")
+    # Only the current delay changes between calls; encode everything else once.
+    static_headers = _build_static_headers(delay_strategy)
 
     repetitions = int(client_cfg.get("repetitions", 1))
     message_template = client_cfg.get("message_template", "Hello from client")
     continue_on_failure = bool(client_cfg.get("continue_on_failure", False))
     reconnect_on_failure = bool(client_cfg.get("reconnect_on_failure", False))
 
+    # Precompute both schedules up front so the loop only indexes into them.
+    delays = delay_strategy.schedule(repetitions).tolist()
+    intervals = interval_strategy.schedule(repetitions).tolist()
+
     LOGGER.info("Starting client with %d repetitions", repetitions)
     last_success_time = time.monotonic()
     next_sleep_seconds = 0.0
+    call_options: Optional[flight.FlightCallOptions] = None
+    options_delay_s: Optional[float] = None
 
     for index in range(1, repetitions + 1):
         if next_sleep_seconds > 0:
@@ -137,8 +154,11 @@ def run_client(config_path: Path) -> None:
         idle_since_last_success = time.monotonic() - last_success_time
         LOGGER.info("Idle %.3f seconds since last successful response", idle_since_last_success)
 
-        current_delay_s = delay_strategy.next_delay()
-        headers = _build_headers(delay_strategy, current_delay_s)
+        current_delay_s = delays[index - 1]
+        if current_delay_s != options_delay_s:
+            # Headers depend only on the delay, so fixed or capped schedules reuse one CallOptions.
+            call_options = flight.FlightCallOptions(headers=_build_headers(static_headers, current_delay_s))
+            options_delay_s = current_delay_s
 
         message_payload = {
             "sequence": index,
@@ -159,19 +179,19 @@ def run_client(config_path: Path) -> None:
             "idle_seconds_before_request": idle_since_last_success,
             "attempt_started_epoch": time.time(),
         }
-        payload_bytes = json.dumps(message_payload).encode("utf8")
+        payload_bytes = orjson.dumps(message_payload)
 
         LOGGER.info("Sending message %d/%d with delay %.3f seconds", index, repetitions, current_delay_s)
-        action = flight.Action("echo", payload_bytes)
-        call_options = flight.FlightCallOptions(headers=headers)
+        action = flight.Action(ECHO_ACTION, payload_bytes)
         attempt_started = time.monotonic()
 
         try:
             results: Iterable[flight.Result] = client.do_action(action, options=call_options)
 
             for result in results:
-                response = json.loads(result.body.to_pybytes().decode("utf8"))
-                LOGGER.info("Received response: %s", json.dumps(response))
+                response = orjson.loads(result.body.to_pybytes())
+                if LOGGER.isEnabledFor(logging.INFO):
+                    LOGGER.info("Received response: %s", json.dumps(response))
 
             last_success_time = time.monotonic()
             round_trip = last_success_time - attempt_started
@@ -182,7 +202,7 @@ def run_client(config_path: Path) -> None:
                 round_trip,
                 idle_since_last_success,
             )
-            next_sleep_seconds = interval_strategy.next_delay() if index < repetitions else 0.0
+            next_sleep_seconds = intervals[index - 1] if index < repetitions else 0.0
         except Exception as exc:  # pragma: no cover - defensive top-level logging
             failure_time = time.monotonic()
             idle_before_failure = failure_time - last_success_time
@@ -196,7 +216,7 @@ def run_client(config_path: Path) -> None:
                 exc,
                 exc_info=exc,
             )
-            next_sleep_seconds = interval_strategy.next_delay() if index < repetitions else 0.0
+            next_sleep_seconds = intervals[index - 1] if index < repetitions else 0.0
             if continue_on_failure and index < repetitions:
                 if reconnect_on_failure:
                     LOGGER.info("Re-establishing Flight channel after failure")
@@ -215,12 +235,15 @@ def run_client(config_path: Path) -> None:
 
 def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Configurable Flight client")
-    parser.add_argument("--config", type=Path, default=Path(__file__).with_name("config.yaml"),
-                        help="Path to the client configuration YAML file")
+    config_source = parser.add_mutually_exclusive_group()
+    config_source.add_argument("--config", type=Path, default=Path(__file__).with_name("config.yaml"),
+                               help="Path to the client configuration YAML file")
+    config_source.add_argument("--config-json", metavar="JSON",
+                               help="Inline JSON configuration, used instead of a configuration file")
     args = parser.parse_args(argv)
 
     try:
-        run_client(args.config)
+        run_client(args.config, args.config_json)
     except (ClientConfigurationError, DelayConfigurationError) as exc:
         LOGGER.error("Configuration error: %s", exc)
         return 1
@@ -4,6 +4,12 @@ import os
 import socket
 import struct
 import time
+from typing import List, Optional
+
+try:  # uvloop is optional; the stock asyncio loop is used where it is unavailable.
+    import uvloop
+except ImportError:  # pragma: no cover - platform specific
+    uvloop = None
 
 LOGGER = logging.getLogger("idle_proxy")
 
@@ -21,73 +27,84 @@ IDLE_CHECK_INTERVAL = float(_env("PROXY_IDLE_CHECK_SECONDS", "1.0"))
 PING_METHOD = _env("PROXY_HTTP_PING_METHOD", "GET").upper()
 PING_PATH = _env("PROXY_HTTP_PING_PATH", "/ping")
 PING_RESPONSE_BODY = _env("PROXY_HTTP_PING_BODY", "PONG")
+CHUNK_SIZE = 65536
+IDLE_TIMEOUT_REASON = "idle timeout"
+_PING_NEEDLE = f"{PING_METHOD} {PING_PATH} ".upper().encode("utf-8")
+_PING_NEEDLE_LEN = len(_PING_NEEDLE)
 
 
 class ProxyConnection:
-    def __init__(
-        self,
-        client_reader: asyncio.StreamReader,
-        client_writer: asyncio.StreamWriter,
-        backend_reader: asyncio.StreamReader,
-        backend_writer: asyncio.StreamWriter,
-    ) -> None:
-        self.client_reader = client_reader
-        self.client_writer = client_writer
-        self.backend_reader = backend_reader
-        self.backend_writer = backend_writer
+    """State shared by the client and backend halves of one proxied connection."""
+
+    def __init__(self, client_transport: asyncio.Transport) -> None:
+        self.client_transport = client_transport
+        self.backend_transport: Optional[asyncio.Transport] = None
         self.last_activity = time.monotonic()
-        self._closed = asyncio.Event()
+        self.closed = False
+        self._idle_check: Optional[asyncio.TimerHandle] = None
+        if IDLE_TIMEOUT > 0:
+            self._schedule_idle_check()
 
     def mark_activity(self) -> None:
         self.last_activity = time.monotonic()
 
-    async def close(self, reason: str) -> None:
-        if self._closed.is_set():
+    def close(self, reason: str) -> None:
+        if self.closed:
             return
-        self._closed.set()
+        self.closed = True
         LOGGER.info("Closing connection due to %s", reason)
-        for writer in (self.client_writer, self.backend_writer):
-            _force_close(writer)
-        await asyncio.gather(
-            _await_close(self.client_writer),
-            _await_close(self.backend_writer),
-            return_exceptions=True,
-        )
+        if self._idle_check is not None:
+            self._idle_check.cancel()
+        # Only an idle timeout emulates the middlebox reset; every other close must
+        # still deliver whatever the transports have already accepted for sending.
+        close = _force_close if reason == IDLE_TIMEOUT_REASON else _graceful_close
+        for transport in (self.client_transport, self.backend_transport):
+            if transport is not None:
+                close(transport)
+
+    def _schedule_idle_check(self) -> None:
+        loop = asyncio.get_running_loop()
+        self._idle_check = loop.call_later(IDLE_CHECK_INTERVAL, self._check_idle)
+
+    def _check_idle(self) -> None:
+        idle_for = time.monotonic() - self.last_activity
+        if idle_for >= IDLE_TIMEOUT:
+            LOGGER.info("Idle timeout exceeded (%.2fs)", idle_for)
+            self.close(IDLE_TIMEOUT_REASON)
+            return
+        self._schedule_idle_check()
 
-    async def wait_closed(self) -> None:
-        await self._closed.wait()
 
+def _force_close(transport: asyncio.BaseTransport) -> None:
+    # Both the stock TransportSocket and uvloop's pseudo-socket proxy setsockopt.
+    sock = transport.get_extra_info("socket")
+    if sock is not None:
+        try:
+            linger = struct.pack("ii", 1, 0)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, linger)
+        except OSError:  # pragma: no cover - platform specific
+            LOGGER.debug("Failed to set SO_LINGER", exc_info=True)
+    transport.abort()
 
-async def _await_close(writer: asyncio.StreamWriter) -> None:
-    try:
-        await writer.wait_closed()
-    except Exception:  # pragma: no cover - defensive
-        LOGGER.debug("wait_closed raised", exc_info=True)
+
+def _graceful_close(transport: asyncio.BaseTransport) -> None:
+    # close() flushes anything still buffered before the FIN goes out.
+    transport.close()
 
 
-def _force_close(writer: asyncio.StreamWriter) -> None:
-    sock = writer.get_extra_info("socket")
-    if not isinstance(sock, socket.socket):
-        writer.close()
+def _set_nodelay(transport: asyncio.BaseTransport) -> None:
+    sock = transport.get_extra_info("socket")
+    if sock is None:  # pragma: no cover - non-socket transport
         return
     try:
-        linger = struct.pack("ii", 1, 0)
-        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, linger)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
     except OSError:  # pragma: no cover - platform specific
-        LOGGER.debug("Failed to set SO_LINGER", exc_info=True)
-    writer.close()
+        LOGGER.debug("Failed to set TCP_NODELAY", exc_info=True)
 
 
-def _detect_http_ping(data: bytes) -> bool:
-    if not data:
-        return False
-    try:
-        text = data.decode("utf-8", errors="ignore")
-    except Exception:  # pragma: no cover - decode failure unlikely
-        return False
-    first_line = text.splitlines()[0] if text else ""
-    needle = f"{PING_METHOD} {PING_PATH} ".upper()
-    return first_line.upper().startswith(needle)
+def _detect_http_ping(data: memoryview) -> bool:
+    # Only the request-line prefix matters, so never decode or split the whole chunk.
+    return bytes(data[:_PING_NEEDLE_LEN]).upper() == _PING_NEEDLE
 
 
 def _ping_response() -> bytes:
@@ -102,82 +119,134 @@ def _ping_response() -> bytes:
     return "\r\n".join(headers).encode("utf-8") + body
 
 
-async def handle_client(
-    client_reader: asyncio.StreamReader,
-    client_writer: asyncio.StreamWriter,
-) -> None:
-    peer = client_writer.get_extra_info("peername")
-    LOGGER.info("Accepted connection from %s", peer)
-    try:
-        backend_reader, backend_writer = await asyncio.open_connection(
-            BACKEND_HOST, BACKEND_PORT
-        )
-    except Exception as exc:  # pragma: no cover - connection errors
-        LOGGER.error("Failed to connect to backend: %s", exc)
-        _force_close(client_writer)
-        return
+_PING_RESPONSE = _ping_response()
 
-    state = ProxyConnection(client_reader, client_writer, backend_reader, backend_writer)
-    idle_task = asyncio.create_task(_idle_watchdog(state))
-    forward_tasks = [
-        asyncio.create_task(_pump_client_to_server(state)),
-        asyncio.create_task(_pump_server_to_client(state)),
-    ]
 
-    done, pending = await asyncio.wait(
-        forward_tasks + [idle_task],
-        return_when=asyncio.FIRST_COMPLETED,
-    )
+class _PumpProtocol(asyncio.BufferedProtocol):
+    """Reads one side of a proxied connection into a reused buffer."""
+
+    eof_reason = "connection closed"
+
+    def __init__(self) -> None:
+        self.state: Optional[ProxyConnection] = None
+        self._buffer = bytearray(CHUNK_SIZE)
+
+    def get_buffer(self, sizehint: int) -> bytearray:
+        return self._buffer
+
+    def buffer_updated(self, nbytes: int) -> None:
+        self.state.mark_activity()
+        self._forward(memoryview(self._buffer)[:nbytes])
 
-    for task in pending:
-        task.cancel()
-    for task in done:
-        if task.cancelled():
-            continue
-        exc = task.exception()
-        if exc:
-            LOGGER.debug("Task raised", exc_info=exc)
+    def _forward(self, data: memoryview) -> None:
+        raise NotImplementedError
 
-    await state.close("proxy shutdown")
+    def _send(self, transport: asyncio.Transport, data: memoryview) -> None:
+        transport.write(data)
+        if transport.get_write_buffer_size():
+            # The transport may hold on to the unsent tail rather than copy it, so the
+            # next read must not land in the same buffer.
+            self._buffer = bytearray(CHUNK_SIZE)
 
+    def eof_received(self) -> bool:
+        self.state.close(self.eof_reason)
+        return False
 
-async def _pump_client_to_server(state: ProxyConnection) -> None:
-    while True:
-        data = await state.client_reader.read(65536)
-        if not data:
-            await state.close("client closed")
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if exc is not None:
+            LOGGER.debug("Connection lost", exc_info=exc)
+        if self.state is not None:
+            self.state.close("connection error" if exc is not None else self.eof_reason)
+
+
+class ClientProtocol(_PumpProtocol):
+    """Accepted client side: answers pings and forwards everything else to the backend."""
+
+    eof_reason = "client closed"
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._pending: List[bytes] = []
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        LOGGER.info("Accepted connection from %s", transport.get_extra_info("peername"))
+        _set_nodelay(transport)
+        self.state = ProxyConnection(transport)
+        # Nothing can be forwarded until the backend is connected.
+        transport.pause_reading()
+        asyncio.get_running_loop().create_task(self._connect_backend())
+
+    async def _connect_backend(self) -> None:
+        state = self.state
+        loop = asyncio.get_running_loop()
+        try:
+            backend_transport, _ = await loop.create_connection(
+                lambda: BackendProtocol(state), BACKEND_HOST, BACKEND_PORT
+            )
+        except Exception as exc:  # pragma: no cover - connection errors
+            LOGGER.error("Failed to connect to backend: %s", exc)
+            state.close("backend unavailable")
+            return
+        if state.closed:
+            backend_transport.close()
             return
-        state.mark_activity()
+        state.backend_transport = backend_transport
+        if self._pending:
+            backend_transport.writelines(self._pending)
+            self._pending.clear()
+        state.client_transport.resume_reading()
+
+    def _forward(self, data: memoryview) -> None:
         if _detect_http_ping(data):
             LOGGER.debug("Responding to HTTP ping without forwarding")
-            state.client_writer.write(_ping_response())
-            await state.client_writer.drain()
-            continue
-        state.backend_writer.write(data)
-        await state.backend_writer.drain()
-
-
-async def _pump_server_to_client(state: ProxyConnection) -> None:
-    while True:
-        data = await state.backend_reader.read(65536)
-        if not data:
-            await state.close("backend closed")
+            self.state.client_transport.write(_PING_RESPONSE)
             return
-        state.mark_activity()
-        state.client_writer.write(data)
-        await state.client_writer.drain()
+        backend_transport = self.state.backend_transport
+        if backend_transport is None:
+            # uvloop may deliver data before the pause in connection_made takes effect.
+            self._pending.append(bytes(data))
+            self.state.client_transport.pause_reading()
+            return
+        self._send(backend_transport, data)
 
+    # The client is not draining its replies: stop reading from the backend until it does.
+    def pause_writing(self) -> None:
+        if self.state.backend_transport is not None:
+            self.state.backend_transport.pause_reading()
 
-async def _idle_watchdog(state: ProxyConnection) -> None:
-    if IDLE_TIMEOUT <= 0:
-        return
-    while True:
-        await asyncio.sleep(IDLE_CHECK_INTERVAL)
-        idle_for = time.monotonic() - state.last_activity
-        if idle_for >= IDLE_TIMEOUT:
-            LOGGER.info("Idle timeout exceeded (%.2fs)", idle_for)
-            await state.close("idle timeout")
-            return
+    def resume_writing(self) -> None:
+        if self.state.backend_transport is not None and not self.state.closed:
+            self.state.backend_transport.resume_reading()
+
+
+class BackendProtocol(_PumpProtocol):
+    """Backend side: forwards replies to the client."""
+
+    eof_reason = "backend closed"
+
+    def __init__(self, state: ProxyConnection) -> None:
+        super().__init__()
+        self.state = state
+
+    def connection_made(self, transport: asyncio.BaseTransport) -> None:
+        _set_nodelay(transport)
+
+    def _forward(self, data: memoryview) -> None:
+        self._send(self.state.client_transport, data)
+
+    # The backend is not keeping up with client requests: stop reading from the client.
+    def pause_writing(self) -> None:
+        self.state.client_transport.pause_reading()
+
+    def resume_writing(self) -> None:
+        if not self.state.closed:
+            self.state.client_transport.resume_reading()
+
+
+async def start_proxy(host: Optional[str], port: int) -> asyncio.AbstractServer:
+    loop = asyncio.get_running_loop()
+    # An empty host means every interface, as it did with asyncio.start_server.
+    return await loop.create_server(ClientProtocol, host or None, port)
 
 
 async def main() -> None:
@@ -185,7 +254,7 @@ async def main() -> None:
         level=logging.INFO,
         format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
     )
-    server = await asyncio.start_server(handle_client, LISTEN_HOST, LISTEN_PORT)
+    server = await start_proxy(LISTEN_HOST, LISTEN_PORT)
     sockets = ", ".join(
         f"{sock.getsockname()[0]}:{sock.getsockname()[1]}" for sock in server.sockets or []
     )
@@ -202,6 +271,9 @@ async def main() -> None:
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:  # pragma: no cover - manual shutdown
         LOGGER.info("Proxy interrupted, shutting down")
@@ -2,46 +2,60 @@
 from __future__ import annotations
 
 import argparse
+import itertools
 import json
 import logging
 import signal
 import sys
 import threading
-import time
 from pathlib import Path
-from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
 
+import orjson
 import pyarrow as pa
 import pyarrow.flight as flight
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 from shared.delay import DelayConfigurationError, DelayStrategy
 from shared.network import apply_tcp_settings
 
 
+class _HeaderView(Mapping):
+    """Read-only view over Flight call headers that decodes values only when looked up."""
+
+    def __init__(self, raw: Mapping[str, List[Union[str, bytes]]]) -> None:
+        self._raw = raw
+
+    def __getitem__(self, key: str) -> str:
+        values = self._raw[key]
+        if not values:
+            raise KeyError(key)
+        value = values[0]
+        return value.decode("utf8") if isinstance(value, bytes) else value
+
+    def __iter__(self) -> Iterator[str]:
+        # Keys without values are not lookupable, so they are not part of the mapping either.
+        return (key for key, values in self._raw.items() if values)
+
+    def __len__(self) -> int:
+        return sum(1 for values in self._raw.values() if values)
+
+
 class HeadersMiddleware(flight.ServerMiddleware):
     """Captures headers for each incoming call."""
 
-    def __init__(self, headers: Optional[Iterable] = None) -> None:
-        normalized: Dict[str, str] = {}
-        for entry in headers or []:
-            try:
-                key, value = entry[0], entry[1]
-            except (TypeError, IndexError):
-                continue
-            if isinstance(key, bytes):
-                key_str = key.decode("utf8")
-            else:
-                key_str = str(key)
-            if isinstance(value, bytes):
-                value_str = value.decode("utf8")
-            else:
-                value_str = str(value)
-            normalized[key_str.lower()] = value_str
-        self._headers = normalized
+    def __init__(self, headers: Optional[Mapping[str, List[Union[str, bytes]]]] = None) -> None:
+        # Flight passes lower-cased header names mapped to lists of values; most of them
+        # (gRPC/HTTP2 metadata) are never read, so decoding is deferred to lookup.
+        self._headers = _HeaderView(headers or {})
 
     @property
-    def headers(self) -> Dict[str, str]:
+    def headers(self) -> Mapping[str, str]:
         return self._headers
 
     def call_completed(self, exception: Optional[Exception]) -> None:  # pragma: no cover - hook for future use
@@ -54,7 +68,7 @@ class HeadersMiddleware(flight.ServerMiddleware):
 class HeadersMiddlewareFactory(flight.ServerMiddlewareFactory):
     """Factory that creates header-capturing middleware instances."""
 
-    def start_call(self, info: flight.CallInfo, headers: List[Tuple[bytes, bytes]]) -> HeadersMiddleware:
+    def start_call(self, info: flight.CallInfo, headers: Dict[str, List[Union[str, bytes]]]) -> HeadersMiddleware:
         return HeadersMiddleware(headers)
 
 LOGGER = logging.getLogger("flight_server")
@@ -64,9 +78,15 @@ class ConfigurationError(Exception):
     """Raised when the configuration file is invalid."""
 
 
-def _load_config(path: Path) -> Dict:
-    with path.open("r", encoding="utf8") as f:
-        data = yaml.safe_load(f)
+def _load_config(path: Path, inline_json: Optional[str] = None) -> Dict:
+    if inline_json is not None:
+        try:
+            data = json.loads(inline_json)
+        except ValueError as exc:
+            raise ConfigurationError(f"Invalid inline JSON configuration: {exc}") from exc
+    else:
+        with path.open("r", encoding="utf8") as f:
+            data = yaml.load(f, Loader=_YamlLoader)
     if not isinstance(data, dict) or "server" not in data:
         raise ConfigurationError("Configuration must contain a 'server' key")
     return data
@@ -87,6 +107,16 @@ def _configure_logging(log_file: Path, level: str) -> None:
 class EchoFlightServer(flight.FlightServerBase):
     """A Flight server that echoes payloads back to the caller."""
 
+    # (DelayStrategy.override keyword, header name, converter or None to keep the string)
+    _OVERRIDE_FIELDS: Tuple[Tuple[str, str, Optional[Callable[[str], float]]], ...] = (
+        ("strategy", "x-delay-strategy", None),
+        ("initial_ms", "x-delay-initial-ms", float),
+        ("linear_increment_ms", "x-delay-linear-increment-ms", float),
+        ("multiplier", "x-delay-multiplier", float),
+        ("exponential_base", "x-delay-exponential-base", float),
+        ("max_ms", "x-delay-max-ms", float),
+    )
+
     def __init__(self, location: str, delay_strategy: DelayStrategy, allow_header_overrides: bool,
                  generic_options: Optional[List[Tuple[str, str]]] = None,
                  network_settings: Optional[Dict[str, object]] = None) -> None:
@@ -95,8 +125,21 @@ class EchoFlightServer(flight.FlightServerBase):
         self._delay_strategy = delay_strategy
         self._allow_header_overrides = allow_header_overrides
         self._lock = threading.Lock()
+        # Closed-form schedules are indexed by an atomic call counter rather than stepped
+        # under the lock; only exponential (and non-monotone capped) schedules need it.
+        self._call_counter = itertools.count() if delay_strategy.has_closed_form else None
         self._network_settings = network_settings or {}
         self._generic_options = generic_options or []
+        self._stopping = threading.Event()
+        if not allow_header_overrides and delay_strategy.strategy == "fixed":
+            # Nothing can vary the delay, so resolve it once and skip the per-call work.
+            self._fixed_delay_seconds = delay_strategy.delay_at(0)
+            self._compute_delay = self._compute_fixed_delay
+
+    def shutdown(self) -> None:
+        # Wake handlers still waiting out their delay; otherwise shutdown blocks until they finish.
+        self._stopping.set()
+        super().shutdown()
 
     def _compute_delay(self, context: flight.ServerCallContext) -> float:
         strategy = self._delay_strategy
@@ -104,61 +147,69 @@ class EchoFlightServer(flight.FlightServerBase):
             header_strategy = self._parse_delay_overrides(context)
             if header_strategy is not None:
                 strategy = header_strategy
-        with self._lock:
+        if strategy is not self._delay_strategy:
+            # Header overrides build a fresh strategy per call, so there is no shared state.
             delay_seconds = strategy.next_delay()
+        elif self._call_counter is not None:
+            delay_seconds = strategy.delay_at(next(self._call_counter))
+        else:
+            with self._lock:
+                delay_seconds = strategy.next_delay()
         LOGGER.info("Applying delay of %.3f seconds", delay_seconds)
         return delay_seconds
 
+    def _compute_fixed_delay(self, context: flight.ServerCallContext) -> float:
+        LOGGER.info("Applying delay of %.3f seconds", self._fixed_delay_seconds)
+        return self._fixed_delay_seconds
+
     def _parse_delay_overrides(self, context: flight.ServerCallContext) -> Optional[DelayStrategy]:
         middleware = context.get_middleware("headers")
         headers = middleware.headers if middleware is not None else {}
         if not headers:
             return None
 
-        def maybe_float(header: str) -> Optional[float]:
+        overrides: Dict[str, object] = {}
+        for field_name, header, convert in self._OVERRIDE_FIELDS:
             value = headers.get(header)
             if value is None:
-                return None
+                continue
+            if convert is None:
+                overrides[field_name] = value
+                continue
             try:
-                return float(value)
+                overrides[field_name] = convert(value)
             except ValueError as exc:
                 raise ConfigurationError(f"Invalid float for header '{header}': {value}") from exc
 
-        def maybe_str(header: str) -> Optional[str]:
-            return headers.get(header)
-
-        overrides = {
-            "strategy": maybe_str("x-delay-strategy"),
-            "initial_ms": maybe_float("x-delay-initial-ms"),
-            "linear_increment_ms": maybe_float("x-delay-linear-increment-ms"),
-            "multiplier": maybe_float("x-delay-multiplier"),
-            "exponential_base": maybe_float("x-delay-exponential-base"),
-            "max_ms": maybe_float("x-delay-max-ms"),
-        }
-
-        if all(value is None for value in overrides.values()):
+        if not overrides:
             return None
 
-        LOGGER.info("Applying header overrides: %s", json.dumps(overrides))
+        if LOGGER.isEnabledFor(logging.INFO):
+            LOGGER.info("Applying header overrides: %s", json.dumps(overrides))
         return self._delay_strategy.override(**overrides)
 
     def do_action(self, context: flight.ServerCallContext, action: flight.Action) -> Iterable[flight.Result]:
         LOGGER.info("Received action '%s' from %s", action.type, context.peer_identity or "unknown client")
-        LOGGER.info("Payload: %s", action.body.to_pybytes().decode("utf8"))
+        # Decode straight from the Arrow buffer rather than copying it out with to_pybytes().
+        message = str(memoryview(action.body), "utf8")
+        LOGGER.info("Payload: %s", message)
 
         delay_seconds = self._compute_delay(context)
-        time.sleep(delay_seconds)
+        if self._stopping.wait(delay_seconds):
+            raise flight.FlightUnavailableError("Server is shutting down")
 
         metadata = {
             "delay_applied_seconds": delay_seconds,
             "strategy": self._delay_strategy.strategy,
             "server_network": self._network_settings,
         }
-        result_payload = json.dumps({
-            "message": action.body.to_pybytes().decode("utf8"),
+        result_payload = orjson.dumps({
+            "message": message,
             "metadata": metadata,
-        }).encode("utf8")
-        LOGGER.info("Sending echo response: %s", result_payload.decode("utf8"))
+        })
+        if LOGGER.isEnabledFor(logging.INFO):
+            # The payload was logged on receipt; echoing it here would decode it a second time.
+            LOGGER.info("Sending echo response with metadata: %s", json.dumps(metadata))
         yield flight.Result(pa.py_buffer(result_payload))
 
     # Minimal implementations to satisfy abstract base class.
@@ -180,8 +231,8 @@ def _build_generic_options(options: List[Dict[str, str]]) -> List[Tuple[str, str
     return generic_options
 
 
-def run_server(config_path: Path) -> None:
-    config = _load_config(config_path)
+def run_server(config_path: Path, config_json: Optional[str] = None) -> None:
+    config = _load_config(config_path, config_json)
     server_cfg = config["server"]
     delay_cfg = server_cfg.get("delay", {})
     delay_strategy = DelayStrategy(
@@ -216,6 +267,8 @@ def run_server(config_path: Path) -> None:
                               allow_header_overrides=allow_header_overrides,
                               generic_options=generic_options,
                               network_settings=network_settings)
+    # The server binds when constructed; report the real port so port 0 (any free port) works.
+    network_settings["port"] = server.port
 
     def handle_signal(signum, frame):  # pragma: no cover - relies on OS signals
         LOGGER.info("Received signal %s. Shutting down.", signum)
@@ -225,18 +278,22 @@ def run_server(config_path: Path) -> None:
     signal.signal(signal.SIGINT, handle_signal)
 
     LOGGER.info("Starting Flight server on %s", location)
+    LOGGER.info("Flight server listening on port %d", server.port)
     server.serve()
     LOGGER.info("Flight server stopped")
 
 
 def main(argv: Optional[List[str]] = None) -> int:
     parser = argparse.ArgumentParser(description="Configurable Flight echo server")
-    parser.add_argument("--config", type=Path, default=Path(__file__).with_name("config.yaml"),
-                        help="Path to the server configuration YAML file")
+    config_source = parser.add_mutually_exclusive_group()
+    config_source.add_argument("--config", type=Path, default=Path(__file__).with_name("config.yaml"),
+                               help="Path to the server configuration YAML file")
+    config_source.add_argument("--config-json", metavar="JSON",
+                               help="Inline JSON configuration, used instead of a configuration file")
     args = parser.parse_args(argv)
 
     try:
-        run_server(args.config)
+        run_server(args.config, args.config_json)
     except (ConfigurationError, DelayConfigurationError) as exc:
         LOGGER.error("Configuration error: %s", exc)
         return 1
@@ -1,9 +1,12 @@
 """Delay strategy helpers shared by the server and clients."""
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass, field
 from typing import Optional
 
+import numpy as np
+
 
 class DelayConfigurationError(Exception):
     """Raised when delay configuration is invalid."""
@@ -23,6 +26,13 @@ class DelayStrategy:
         if self.initial_ms < 0:
             raise DelayConfigurationError("initial_ms must be non-negative")
         self._current_ms = self.initial_ms
+        # Resolve the strategy once; the plain function is called with self, so copies
+        # of this instance never step each other's schedule.
+        try:
+            self._step_fn = self._STEPS[self.strategy]
+        except KeyError:
+            raise DelayConfigurationError(f"Unsupported delay strategy: {self.strategy}") from None
+        self._closed_form = self._has_closed_form_from(self.initial_ms)
 
     def override(self, *, initial_ms: Optional[float] = None, strategy: Optional[str] = None,
                  linear_increment_ms: Optional[float] = None, multiplier: Optional[float] = None,
@@ -37,25 +47,106 @@ class DelayStrategy:
         }
         return DelayStrategy(**params)
 
-    def next_delay(self) -> float:
-        delay_ms = self._current_ms
+    @property
+    def has_closed_form(self) -> bool:
+        """Whether :meth:`delay_at` can compute this schedule without stepping it."""
+        return self._closed_form
+
+    def _has_closed_form_from(self, start_ms: float) -> bool:
+        # Capping each step only commutes with the recurrence while the schedule is monotone.
         if self.strategy == "fixed":
-            pass
-        elif self.strategy == "linear":
-            self._current_ms += self.linear_increment_ms
-        elif self.strategy == "multiplier":
-            self._current_ms *= self.multiplier
-        elif self.strategy == "exponential":
-            self._current_ms = self.exponential_base ** (self._current_ms / 1000.0)
-            delay_ms = self._current_ms
+            return True
+        if self.strategy == "exponential" or (self.strategy == "multiplier" and self.multiplier < 0):
+            return False
+        return self.max_ms is None or start_ms <= self.max_ms
+
+    def delay_at(self, index: int) -> float:
+        """Return the delay in seconds for the ``index``-th call (0-based) of a fresh schedule.
+
+        Unlike :meth:`next_delay` this does not touch any state, so it is safe to call from
+        several threads at once. Only valid when :attr:`has_closed_form` is true.
+        """
+        if not self._closed_form:
+            raise DelayConfigurationError(f"Delay strategy {self.strategy!r} has no closed form")
+        if self.strategy == "linear":
+            delay_ms = self.initial_ms + index * self.linear_increment_ms
+        elif self.strategy == "multiplier" and self.initial_ms:
+            try:
+                delay_ms = self.initial_ms * self.multiplier ** index
+            except OverflowError:
+                delay_ms = math.inf
         else:
-            raise DelayConfigurationError(f"Unsupported delay strategy: {self.strategy}")
+            delay_ms = self.initial_ms
+        if self.max_ms is not None and delay_ms > self.max_ms:
+            delay_ms = self.max_ms
+        return max(delay_ms, 0.0) / 1000.0
+
+    def schedule(self, count: int) -> np.ndarray:
+        """Return the next ``count`` delays in seconds, advancing the schedule.
 
-        if self.max_ms is not None:
-            self._current_ms = min(self._current_ms, self.max_ms)
-            delay_ms = min(delay_ms, self.max_ms)
+        Equivalent to calling :meth:`next_delay` ``count`` times. Fixed, linear and
+        non-negative multiplier schedules are computed with cumulative NumPy
+        operations; anything whose cap is not monotone falls back to stepping.
+        """
+        if count <= 0:
+            return np.empty(0)
+        current_ms = self._current_ms
+        max_ms = self.max_ms
+        if not self._has_closed_form_from(current_ms):
+            return np.fromiter((self.next_delay() for _ in range(count)), dtype=float, count=count)
 
+        if self.strategy == "fixed":
+            states = np.full(count + 1, current_ms, dtype=float)
+        elif self.strategy == "linear":
+            states = np.full(count + 1, self.linear_increment_ms, dtype=float)
+            states[0] = current_ms
+            np.cumsum(states, out=states)
+        else:
+            states = np.full(count + 1, self.multiplier, dtype=float)
+            states[0] = current_ms
+            with np.errstate(over="ignore"):
+                np.cumprod(states, out=states)
+        if max_ms is not None:
+            np.minimum(states, max_ms, out=states)
+        self._current_ms = float(states[-1])
+        delays = np.maximum(states[:-1], 0.0)
+        delays /= 1000.0
+        return delays
+
+    def next_delay(self) -> float:
+        """Return the next delay in seconds and advance the schedule."""
+        delay_ms = self._step_fn(self)
+        max_ms = self.max_ms
+        if max_ms is not None:
+            if self._current_ms > max_ms:
+                self._current_ms = max_ms
+            if delay_ms > max_ms:
+                delay_ms = max_ms
         return max(delay_ms, 0.0) / 1000.0
 
+    def _next_fixed(self) -> float:
+        return self._current_ms
+
+    def _next_linear(self) -> float:
+        delay_ms = self._current_ms
+        self._current_ms = delay_ms + self.linear_increment_ms
+        return delay_ms
+
+    def _next_multiplier(self) -> float:
+        delay_ms = self._current_ms
+        self._current_ms = delay_ms * self.multiplier
+        return delay_ms
+
+    def _next_exponential(self) -> float:
+        self._current_ms = self.exponential_base ** (self._current_ms / 1000.0)
+        return self._current_ms
+
+    _STEPS = {
+        "fixed": _next_fixed,
+        "linear": _next_linear,
+        "multiplier": _next_multiplier,
+        "exponential": _next_exponential,
+    }
+
     def reset(self) -> None:
         self._current_ms = self.initial_ms
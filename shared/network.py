@@ -3,10 +3,21 @@ from __future__ import annotations
 
 import logging
 import os
+import socket
 from typing import Dict, Optional
 
 LOGGER = logging.getLogger(__name__)
 
+_TCP_SUPPORTED = hasattr(socket, "SOL_SOCKET")
+
+# (tcp_settings key, environment variable, formatter for the variable's value)
+_TCP_ENV_OVERRIDES = (
+    ("tcp_keepalive", "PYARROW_TCP_KEEPALIVE", lambda value: "1"),
+    ("tcp_keepidle", "PYARROW_TCP_KEEPIDLE", str),
+    ("tcp_keepintvl", "PYARROW_TCP_KEEPINTVL", str),
+    ("tcp_keepcnt", "PYARROW_TCP_KEEPCNT", str),
+)
+
 
 def apply_tcp_settings(tcp_settings: Optional[Dict[str, object]], *, logger: Optional[logging.Logger] = None) -> None:
     """Apply TCP keep-alive related environment overrides for Flight sockets.
@@ -24,22 +35,11 @@ def apply_tcp_settings(tcp_settings: Optional[Dict[str, object]], *, logger: Opt
     if not tcp_settings:
         return
 
-    log = logger or LOGGER
-
-    try:
-        import socket  # pylint: disable=import-outside-toplevel
-
-        if not hasattr(socket, "SOL_SOCKET"):
-            log.warning("TCP settings not supported on this platform")
-            return
-
-        if tcp_settings.get("tcp_keepalive"):
-            os.environ.setdefault("PYARROW_TCP_KEEPALIVE", "1")
-        if tcp_settings.get("tcp_keepidle") is not None:
-            os.environ.setdefault("PYARROW_TCP_KEEPIDLE", str(tcp_settings["tcp_keepidle"]))
-        if tcp_settings.get("tcp_keepintvl") is not None:
-            os.environ.setdefault("PYARROW_TCP_KEEPINTVL", str(tcp_settings["tcp_keepintvl"]))
-        if tcp_settings.get("tcp_keepcnt") is not None:
-            os.environ.setdefault("PYARROW_TCP_KEEPCNT", str(tcp_settings["tcp_keepcnt"]))
-    except Exception as exc:  # pragma: no cover - platform specific fallback
-        log.warning("Failed to apply TCP settings: %s", exc)
+    if not _TCP_SUPPORTED:  # pragma: no cover - platform specific
+        (logger or LOGGER).warning("TCP settings not supported on this platform")
+        return
+
+    for key, env_var, format_value in _TCP_ENV_OVERRIDES:
+        value = tcp_settings.get(key)
+        if value:
+            os.environ.setdefault(env_var, format_value(value))
@@ -0,0 +1,56 @@
+"""In-process checks that delay-override headers reach the echo server."""
+from __future__ import annotations
+
+from typing import Iterator, List, Tuple
+
+import orjson
+import pyarrow.flight as flight
+import pytest
+
+from server.flight_server import EchoFlightServer, _HeaderView
+from shared.delay import DelayStrategy
+
+
+@pytest.fixture
+def echo_server() -> Iterator[EchoFlightServer]:
+    server = EchoFlightServer(
+        "grpc://127.0.0.1:0",
+        DelayStrategy(strategy="fixed", initial_ms=0.0),
+        allow_header_overrides=True,
+    )
+    try:
+        yield server
+    finally:
+        server.shutdown()
+
+
+def _echo(server: EchoFlightServer, headers: List[Tuple[bytes, bytes]]) -> dict:
+    with flight.FlightClient(f"grpc://127.0.0.1:{server.port}") as client:
+        options = flight.FlightCallOptions(headers=headers, timeout=10)
+        results = list(client.do_action(flight.Action("echo", b"ping"), options=options))
+    return orjson.loads(results[0].body.to_pybytes())
+
+
+def test_header_view_skips_keys_without_values() -> None:
+    view = _HeaderView({"x-delay-initial-ms": [b"250"], "x-empty": [], "x-delay-strategy": ["linear"]})
+
+    assert dict(view) == {"x-delay-initial-ms": "250", "x-delay-strategy": "linear"}
+    assert len(view) == 2
+    assert "x-empty" not in view
+
+
+@pytest.mark.integration
+@pytest.mark.timeout(60)
+def test_header_override_changes_applied_delay(echo_server: EchoFlightServer) -> None:
+    assert _echo(echo_server, [])["metadata"]["delay_applied_seconds"] == 0.0
+
+    response = _echo(echo_server, [(b"x-delay-initial-ms", b"250")])
+
+    assert response["metadata"]["delay_applied_seconds"] == pytest.approx(0.25)
+
+
+@pytest.mark.integration
+@pytest.mark.timeout(60)
+def test_non_float_header_override_is_rejected(echo_server: EchoFlightServer) -> None:
+    with pytest.raises(flight.FlightError, match="Invalid float for header 'x-delay-initial-ms'"):
+        _echo(echo_server, [(b"x-delay-initial-ms", b"abc")])
@@ -0,0 +1,98 @@
+"""In-process checks of the idle proxy against a local backend."""
+from __future__ import annotations
+
+import asyncio
+from typing import Awaitable, Callable, Tuple
+
+import pytest
+
+from proxy import idle_proxy
+
+Handler = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+Scenario = Callable[[int], Awaitable[None]]
+
+_BULK = bytes(range(256)) * 65536  # 16 MiB with a pattern, so reordering or reuse shows up
+
+
+async def _echo_backend(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    while data := await reader.read(65536):
+        writer.write(data)
+        await writer.drain()
+    writer.close()
+
+
+async def _bulk_backend(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    writer.write(_BULK)
+    await writer.drain()
+    writer.close()
+
+
+def _run(monkeypatch: pytest.MonkeyPatch, backend: Handler, scenario: Scenario,
+         idle_timeout: float = 0.0) -> None:
+    monkeypatch.setattr(idle_proxy, "IDLE_TIMEOUT", idle_timeout)
+    monkeypatch.setattr(idle_proxy, "IDLE_CHECK_INTERVAL", 0.05)
+
+    async def run() -> None:
+        backend_server = await asyncio.start_server(backend, "127.0.0.1", 0)
+        monkeypatch.setattr(idle_proxy, "BACKEND_HOST", "127.0.0.1")
+        monkeypatch.setattr(idle_proxy, "BACKEND_PORT", backend_server.sockets[0].getsockname()[1])
+        proxy_server = await idle_proxy.start_proxy("127.0.0.1", 0)
+        async with backend_server, proxy_server:
+            await asyncio.wait_for(scenario(proxy_server.sockets[0].getsockname()[1]), 30.0)
+
+    asyncio.run(run())
+
+
+async def _connect(port: int) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    return await asyncio.open_connection("127.0.0.1", port)
+
+
+@pytest.mark.integration
+@pytest.mark.timeout(60)
+def test_forwards_traffic_to_backend(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def scenario(port: int) -> None:
+        reader, writer = await _connect(port)
+        writer.write(b"hello through the proxy")
+        assert await reader.readexactly(23) == b"hello through the proxy"
+        writer.close()
+
+    _run(monkeypatch, _echo_backend, scenario)
+
+
+@pytest.mark.integration
+@pytest.mark.timeout(60)
+def test_answers_ping_case_insensitively(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def scenario(port: int) -> None:
+        reader, writer = await _connect(port)
+        writer.write(b"get /PING HTTP/1.1\r\nHost: proxy\r\n\r\n")
+        response = await reader.readexactly(len(idle_proxy._PING_RESPONSE))
+        assert response.startswith(b"HTTP/1.1 200 OK\r\n")
+        assert response.endswith(b"\r\n\r\nPONG")
+        writer.close()
+
+    _run(monkeypatch, _echo_backend, scenario)
+
+
+@pytest.mark.integration
+@pytest.mark.timeout(60)
+def test_idle_timeout_resets_client(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def scenario(port: int) -> None:
+        reader, writer = await _connect(port)
+        with pytest.raises(ConnectionResetError):
+            await reader.read(1)
+        writer.close()
+
+    _run(monkeypatch, _echo_backend, scenario, idle_timeout=0.2)
+
+
+@pytest.mark.integration
+@pytest.mark.timeout(60)
+def test_backend_eof_delivers_buffered_data(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def scenario(port: int) -> None:
+        reader, writer = await _connect(port)
+        # Let the backend finish and close while most of the data is still queued.
+        await asyncio.sleep(0.5)
+        assert await reader.read() == _BULK
+        writer.close()
+
+    _run(monkeypatch, _bulk_backend, scenario)
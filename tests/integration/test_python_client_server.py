@@ -1,110 +1,120 @@
 """Integration test ensuring the Python client and server communicate."""
 from __future__ import annotations
 
-import json
+import asyncio
+import copy
 import os
+import re
 import signal
-import socket
-import subprocess
 import sys
-import time
 from pathlib import Path
+from typing import Dict, Tuple
 
+import orjson
 import pytest
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # pragma: no cover - PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 REPO_ROOT = Path(__file__).resolve().parents[2]
 SERVER_DIR = REPO_ROOT / "server"
 CLIENT_DIR = REPO_ROOT / "clients" / "python"
 
 
-@pytest.mark.integration
-@pytest.mark.timeout(120)
-def _wait_for_port(host: str, port: int, timeout: float = 15.0) -> None:
-    deadline = time.time() + timeout
-    while time.time() < deadline:
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-            sock.settimeout(1.0)
-            try:
-                sock.connect((host, port))
-                return
-            except OSError:
-                time.sleep(0.25)
-    raise TimeoutError(f"Server did not start listening on {host}:{port} within {timeout} seconds")
-
-
-def test_python_client_server_round_trip(tmp_path: Path) -> None:
-    env = os.environ.copy()
-    env["PYTHONPATH"] = str(REPO_ROOT)
+_LISTENING_RE = re.compile(rb"Flight server listening on port (\d+)\r?\n")
+_ECHO_RE = re.compile(rb"Sending echo response")
 
-    with (SERVER_DIR / "config.yaml").open("r", encoding="utf8") as f:
-        server_config = yaml.safe_load(f)
-    with (CLIENT_DIR / "config.yaml").open("r", encoding="utf8") as f:
-        client_config = yaml.safe_load(f)
-
-    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-        sock.bind(("127.0.0.1", 0))
-        _, port = sock.getsockname()
-
-    server_log = tmp_path / "server.log"
-    client_log = tmp_path / "client.log"
-
-    server_config["server"]["port"] = int(port)
-    server_config["server"]["log_file"] = str(server_log)
-    host = "127.0.0.1"
-    client_config["client"]["port"] = int(port)
-    client_config["client"]["host"] = host
-    client_config["client"]["log_file"] = str(client_log)
-    client_config["client"]["repetitions"] = 2
-    client_config["client"]["interval"]["initial_ms"] = 0
-
-    server_config_path = tmp_path / "server_config.yaml"
-    client_config_path = tmp_path / "client_config.yaml"
-    with server_config_path.open("w", encoding="utf8") as f:
-        yaml.safe_dump(server_config, f)
-    with client_config_path.open("w", encoding="utf8") as f:
-        yaml.safe_dump(client_config, f)
-
-    server_cmd = [sys.executable, "-m", "server.flight_server", "--config", str(server_config_path)]
-    client_cmd = [sys.executable, "-m", "clients.python.flight_client", "--config", str(client_config_path)]
-
-    server_env = env.copy()
-    client_env = env.copy()
-
-    server_proc = subprocess.Popen(server_cmd, cwd=REPO_ROOT, env=server_env, stdout=subprocess.PIPE,
-                                   stderr=subprocess.STDOUT, text=True)
-    client_proc: subprocess.CompletedProcess[str] | None = None
-    try:
-        _wait_for_port(host, int(port))
 
-        client_proc = subprocess.run(client_cmd, cwd=REPO_ROOT, env=client_env, check=False,
-                                     capture_output=True, text=True)
+async def _drain_until(stream: asyncio.StreamReader, output: bytearray,
+                       pattern: re.Pattern[bytes]) -> re.Match[bytes]:
+    """Append lines from ``stream`` to ``output`` until one of them matches ``pattern``."""
+    while True:
+        line = await stream.readline()
+        if not line:
+            raise AssertionError(f"Server exited before logging {pattern.pattern!r}\nOUTPUT:\n{output.decode('utf8', 'replace')}")
+        output += line
+        match = pattern.search(line)
+        if match:
+            return match
+
+
+async def _run_round_trip(server_config: Dict, client_config: Dict, env: Dict[str, str]) -> Tuple[bytes, bytes]:
+    # Hand the rewritten configs over inline instead of emitting YAML files.
+    server_proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "server.flight_server", "--config-json", orjson.dumps(server_config).decode(),
+        cwd=REPO_ROOT, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+    )
+    server_output = bytearray()
+    echo_logged: asyncio.Task | None = None
+    try:
+        listening = await asyncio.wait_for(_drain_until(server_proc.stdout, server_output, _LISTENING_RE), 15.0)
+
+        client_config["client"]["port"] = int(listening.group(1))
+        client_proc = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "clients.python.flight_client", "--config-json", orjson.dumps(client_config).decode(),
+            cwd=REPO_ROOT, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        # Keep draining the server while the client runs so its pipe never fills up.
+        echo_logged = asyncio.create_task(_drain_until(server_proc.stdout, server_output, _ECHO_RE))
+        client_stdout, client_stderr = await client_proc.communicate()
         if client_proc.returncode != 0:
             raise AssertionError(
-                f"Client failed with code {client_proc.returncode}\nSTDOUT:\n{client_proc.stdout}\nSTDERR:\n{client_proc.stderr}"
+                f"Client failed with code {client_proc.returncode}\nSTDOUT:\n{client_stdout.decode()}\nSTDERR:\n{client_stderr.decode()}"
             )
 
-        # Allow server to process the last request.
-        time.sleep(2)
+        # Wait for the server to log its reply rather than sleeping a fixed amount.
+        await asyncio.wait_for(echo_logged, 2.0)
     finally:
-        server_proc.send_signal(signal.SIGINT)
+        if echo_logged is not None and not echo_logged.done():
+            echo_logged.cancel()
+        server_proc.send_signal(signal.SIGTERM)
         try:
-            stdout, _ = server_proc.communicate(timeout=10)
-        except subprocess.TimeoutExpired:
+            remaining, _ = await asyncio.wait_for(asyncio.gather(server_proc.stdout.read(), server_proc.wait()), 2.0)
+            server_output += remaining
+        except asyncio.TimeoutError:
             server_proc.kill()
-            stdout, _ = server_proc.communicate()
+            await server_proc.wait()
+
+    return bytes(server_output), client_stdout
 
-    server_output = stdout if stdout else ""
-    assert "Sending echo response" in server_output
 
-    assert client_proc is not None
-    client_stdout = client_proc.stdout
-    assert "Received response" in client_stdout
+@pytest.fixture(scope="session")
+def _cfg_templates() -> Tuple[Dict, Dict]:
+    """Parse the shipped configs once and apply the rewrites shared by every test."""
+    server_cfg = yaml.load((SERVER_DIR / "config.yaml").read_bytes(), Loader=_YamlLoader)
+    client_cfg = yaml.load((CLIENT_DIR / "config.yaml").read_bytes(), Loader=_YamlLoader)
+
+    # Port 0 lets the server pick a free port, which it reports once bound.
+    server_cfg["server"]["port"] = 0
+    client_cfg["client"]["host"] = "127.0.0.1"
+    client_cfg["client"]["repetitions"] = 2
+    client_cfg["client"]["interval"]["initial_ms"] = 0
+    return server_cfg, client_cfg
+
+
+@pytest.mark.integration
+@pytest.mark.timeout(120)
+def test_python_client_server_round_trip(tmp_path: Path, _cfg_templates: Tuple[Dict, Dict]) -> None:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(REPO_ROOT)
+
+    server_config, client_config = copy.deepcopy(_cfg_templates)
+    server_config["server"]["log_file"] = str(tmp_path / "server.log")
+    client_config["client"]["log_file"] = str(tmp_path / "client.log")
+
+    server_output, client_stdout = asyncio.run(_run_round_trip(server_config, client_config, env))
+
+    # The markers are checked on the raw bytes; only failure messages need decoding.
+    assert b"Sending echo response" in server_output, server_output.decode("utf8", "replace")
+    assert b"Received response" in client_stdout, client_stdout.decode("utf8", "replace")
 
     # Validate that the client saw a JSON response with metadata.
-    last_response_line = next(
-        line for line in reversed(client_stdout.splitlines()) if "Received response" in line
-    )
-    payload = json.loads(last_response_line.split("Received response: ", 1)[1])
+    marker = b"Received response: "
+    start = client_stdout.rfind(marker) + len(marker)
+    end = client_stdout.find(b"\n", start)
+    payload = orjson.loads(client_stdout[start:end if end != -1 else None])
     assert "metadata" in payload
     assert "delay_applied_seconds" in payload["metadata"]
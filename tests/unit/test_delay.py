@@ -0,0 +1,82 @@
+"""Check the vectorised DelayStrategy helpers against stepping next_delay()."""
+from __future__ import annotations
+
+import copy
+import dataclasses
+import itertools
+from typing import Dict, List
+
+import pytest
+
+from shared.delay import DelayStrategy
+
+_COUNT = 12
+
+_CASES: List[Dict] = [
+    {"strategy": "fixed", "initial_ms": 0.0},
+    {"strategy": "fixed", "initial_ms": 250.0},
+    {"strategy": "fixed", "initial_ms": 500.0, "max_ms": 200.0},
+]
+_CASES += [
+    {"strategy": "linear", "initial_ms": initial, "linear_increment_ms": increment, "max_ms": max_ms}
+    for initial, increment, max_ms in itertools.product((0.0, 100.0, 950.0), (0.0, 37.5, 150.0, -40.0), (None, 600.0))
+]
+_CASES += [
+    {"strategy": "multiplier", "initial_ms": initial, "multiplier": multiplier, "max_ms": max_ms}
+    for initial, multiplier, max_ms in itertools.product((0.0, 10.0, 900.0), (0.5, 1.0, 1.1, 2.0, -1.5), (None, 500.0))
+]
+_CASES += [
+    {"strategy": "exponential", "initial_ms": initial, "exponential_base": base, "max_ms": max_ms}
+    for initial, base, max_ms in itertools.product((0.0, 1000.0, 5000.0), (1.01, 1.5, 2.0), (None, 3.0))
+]
+
+
+def _case_id(case: Dict) -> str:
+    return "-".join(f"{key}={value}" for key, value in case.items())
+
+
+def _stepped(case: Dict, count: int) -> List[float]:
+    strategy = DelayStrategy(**case)
+    return [strategy.next_delay() for _ in range(count)]
+
+
+@pytest.mark.parametrize("case", _CASES, ids=_case_id)
+def test_schedule_matches_next_delay(case: Dict) -> None:
+    assert DelayStrategy(**case).schedule(_COUNT).tolist() == _stepped(case, _COUNT)
+
+
+@pytest.mark.parametrize("case", _CASES, ids=_case_id)
+@pytest.mark.parametrize("split", [1, 5, _COUNT - 1])
+def test_split_schedule_matches_next_delay(case: Dict, split: int) -> None:
+    strategy = DelayStrategy(**case)
+    delays = strategy.schedule(split).tolist() + strategy.schedule(_COUNT - split).tolist()
+    assert delays == _stepped(case, _COUNT)
+    # The schedule must also leave the strategy where stepping would have.
+    assert strategy.next_delay() == _stepped(case, _COUNT + 1)[-1]
+
+
+@pytest.mark.parametrize("case", _CASES, ids=_case_id)
+def test_delay_at_matches_next_delay(case: Dict) -> None:
+    strategy = DelayStrategy(**case)
+    if not strategy.has_closed_form:
+        pytest.skip("delay_at() only covers closed-form schedules")
+    expected = _stepped(case, _COUNT)
+    # Powers of the multiplier may round differently from repeated multiplication.
+    assert [strategy.delay_at(i) for i in range(_COUNT)] == pytest.approx(expected, rel=1e-12)
+
+
+def test_closed_form_rules() -> None:
+    assert DelayStrategy("fixed", 500.0, max_ms=200.0).has_closed_form
+    assert DelayStrategy("linear", 100.0, linear_increment_ms=50.0, max_ms=400.0).has_closed_form
+    assert not DelayStrategy("linear", 500.0, linear_increment_ms=50.0, max_ms=400.0).has_closed_form
+    assert not DelayStrategy("multiplier", 100.0, multiplier=-1.5).has_closed_form
+    assert not DelayStrategy("exponential", 1000.0).has_closed_form
+
+
+def test_copies_step_independently() -> None:
+    original = DelayStrategy("linear", 100.0, linear_increment_ms=100.0)
+    clone = copy.copy(original)
+    clone.next_delay()
+    clone.next_delay()
+    assert original.next_delay() == 0.1
+    assert [f.name for f in dataclasses.fields(original)][-1] == "_current_ms"